@@ -130,9 +130,14 @@ class Tree(app_commands.CommandTree):
         guild: Snowflake | int | None = None,
     ) -> app_commands.AppCommand | None:
         def search_dict(d: AppCommandStore) -> app_commands.AppCommand | None:
-            for cmd_name, cmd in d.items():
-                if value == cmd_name or (str(value).isdigit() and int(value) == cmd.id):
-                    return cmd
+            if cmd := d.get(value):
+                return cmd
+
+            if str(value).isdigit():
+                command_id = int(value)
+                for cmd in d.values():
+                    if cmd.id == command_id:
+                        return cmd
             return None
 
         if guild:
@@ -271,6 +276,15 @@ class Bot(commands.Bot):
 
         return float('nan')
 
+    # only access these after the bot has logged in
+    @discord.utils.cached_property
+    def _mentions(self) -> frozenset[str]:
+        return frozenset((f'<@{self.user.id}>', f'<@!{self.user.id}>'))
+
+    @discord.utils.cached_property
+    def _mention_prefixes(self) -> frozenset[str]:
+        return frozenset(mention + ' ' for mention in self._mentions)
+
     def add_command(self, command: Command, /) -> None:
         if isinstance(command, Command):
             command.transform_flag_parameters()
@@ -351,7 +365,7 @@ class Bot(commands.Bot):
             prefix = default_prefix
 
         if isinstance(prefix, list):
-            prefix = discord.utils.find(lambda p: p not in {f'<@{self.user.id}> ', f'<@!{self.user.id}> '}, prefix)
+            prefix = discord.utils.find(lambda p: p not in self._mention_prefixes, prefix)
             if prefix is None:
                 return f'@{self.user.display_name} '
 
@@ -361,7 +375,7 @@ class Bot(commands.Bot):
         if message.author.bot:
             return
 
-        if message.content in {f'<@{self.user.id}>', f'<@!{self.user.id}>'}:
+        if message.content in self._mentions:
             prefix = await self._get_display_prefix(message)
             help_guide = self.tree.get_app_command('help guide').mention
             help_commands = self.tree.get_app_command('help commands').mention
@@ -1886,6 +1886,7 @@ class Items:
 
 
 ITEMS_INST = Items()
+ALL_ITEMS: tuple[Item, ...] = tuple(Items.all())
 
 
 class Reward(NamedTuple):
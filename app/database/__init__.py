@@ -5,9 +5,11 @@ import datetime
 import json
 import random
 from abc import ABC, abstractmethod
+from bisect import bisect_left
 from collections import defaultdict
 from dataclasses import dataclass
 from enum import IntEnum
+from functools import lru_cache
 from string import ascii_letters
 from typing import Any, Awaitable, Callable, Generator, Iterable, Literal, NamedTuple, Protocol, overload, TYPE_CHECKING
 
@@ -192,9 +194,35 @@ class InventoryMapping(dict[Item, int]):
         return super().__contains__(item)
 
 
+class QuantityMapping(InventoryMapping):
+    """An inventory mapping of item quantities that also keeps its worth and unique item count up to date."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.total_worth: int = 0
+        self.owned_count: int = 0
+
+    def __setitem__(self, item: Item | str, value: int) -> None:
+        if isinstance(item, str):
+            item = get_by_key(Items, item)
+
+        if item is None:
+            return
+
+        old = dict.get(self, item, 0)
+        self.total_worth += item.price * (value - old)
+        self.owned_count += (value > 0) - (old > 0)
+        return super().__setitem__(item, value)
+
+    def clear(self) -> None:
+        super().clear()
+        self.total_worth = 0
+        self.owned_count = 0
+
+
 class InventoryManager:
     def __init__(self, record: UserRecord) -> None:
-        self.cached: InventoryMapping = InventoryMapping()
+        self.cached: QuantityMapping = QuantityMapping()
         self.damage: InventoryMapping = InventoryMapping()  # stored separately to avoid breaking chances
 
         self._record: UserRecord = record
@@ -593,7 +621,8 @@ class NotificationsManager:
             await self._record.add(unread_notifications=1, connection=connection)
 
 
-class SkillInfo(NamedTuple):
+@dataclass(slots=True)
+class SkillInfo:
     skill: str
     points: int
     cooldown_until: datetime.datetime | None
@@ -666,7 +695,10 @@ class SkillManager:
                 """
 
         row = await (connection or self._record.db).fetchrow(query, self._record.user_id, skill, points)
-        self.cached[skill] = SkillInfo.from_record(row)
+        if skill_record := self.cached.get(skill):
+            skill_record.points = row['points']
+        else:
+            self.cached[skill] = SkillInfo.from_record(row)
 
     async def add_skill_cooldown(
         self, skill: Skill | str, cooldown: datetime.timedelta, *, connection: asyncpg.Connection | None = None,
@@ -683,7 +715,10 @@ class SkillManager:
                 """
 
         row = await (connection or self._record.db).fetchrow(query, self._record.user_id, skill, cooldown)
-        self.cached[skill] = SkillInfo.from_record(row)
+        if skill_record := self.cached.get(skill):
+            skill_record.cooldown_until = row['on_cooldown_until']
+        else:
+            self.cached[skill] = SkillInfo.from_record(row)
 
 
 class CooldownInfo(NamedTuple):
@@ -1183,17 +1218,35 @@ class AbilityManager:
         self.cached[ability] = AbilityRecord.from_record(manager=self, record=record)
 
 
-class UserHistoryEntry(NamedTuple):
-    wallet: int
-    total: int
+class UserHistory:
+    """Stores a user's coin history as parallel columns, ordered by timestamp."""
 
-    @property
-    def bank(self) -> int:
-        return self.total - self.wallet
+    __slots__ = ('timestamps', 'wallet', 'total')
+
+    def __init__(self) -> None:
+        self.timestamps: list[datetime.datetime] = []
+        self.wallet: list[int] = []
+        self.total: list[int] = []
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def append(self, record: asyncpg.Record) -> None:
+        self.timestamps.append(record['timestamp'])
+        self.wallet.append(record['wallet'])
+        self.total.append(record['total'])
 
     @classmethod
-    def from_record(cls, record: asyncpg.Record) -> Self:
-        return cls(record['wallet'], record['total'])
+    def from_records(cls, records: Iterable[asyncpg.Record]) -> Self:
+        history = cls()
+        for record in records:
+            history.append(record)
+        return history
+
+    def since(self, threshold: datetime.datetime) -> tuple[list[datetime.datetime], list[int], list[int]]:
+        """Returns copies of the (timestamps, wallet, total) columns from the given threshold onwards."""
+        position = bisect_left(self.timestamps, threshold)
+        return self.timestamps[position:], self.wallet[position:], self.total[position:]
 
 
 class Multiplier(NamedTuple):
@@ -1216,6 +1269,11 @@ class Multiplier(NamedTuple):
         return base
 
 
+@lru_cache(maxsize=None)
+def _prestige_multiplier_title(prestige: int) -> str:
+    return f'{Emojis.get_prestige_emoji(prestige)} Prestige {prestige}'
+
+
 class BaseRecord(ABC):
     data: dict[str, Any]
 
@@ -1291,7 +1349,7 @@ class UserRecord(BaseRecord):
         self.user_id: int = user_id
         self.data: dict[str, Any] = {}
 
-        self.history: list[tuple[datetime.datetime, UserHistoryEntry]] = []  # Experimental
+        self.history: UserHistory = UserHistory()  # Experimental
         self.__history_fetched: bool = False
 
         self.__inventory_manager: InventoryManager | None = None
@@ -1305,15 +1363,14 @@ class UserRecord(BaseRecord):
         return f'<UserRecord wallet={self.wallet} bank={self.bank} level_data={self.level_data}>'
 
     async def update_history(self, connection: asyncpg.Connection) -> None:
-        if self.history:
-            _, previous = self.history[-1]
-            # Prevent a useless duplicate entry
-            if previous.wallet == self.wallet and previous.total == self.total_coins:
-                return
+        history = self.history
+        # Prevent a useless duplicate entry
+        if history and history.wallet[-1] == self.wallet and history.total[-1] == self.total_coins:
+            return
 
         query = 'INSERT INTO user_coins_graph_data (user_id, wallet, total) VALUES ($1, $2, $3) RETURNING *;'
         record = await connection.fetchrow(query, self.user_id, self.wallet, self.total_coins)
-        self.history.append((record['timestamp'], UserHistoryEntry.from_record(record)))
+        self.history.append(record)
 
     async def fetch(self) -> UserRecord:
         await self.db.wait()
@@ -1332,13 +1389,12 @@ class UserRecord(BaseRecord):
 
     async def fetch_history(self, connection: asyncpg.Connection) -> None:
         self.__history_fetched = True
-        self.history = [
-            (record['timestamp'], UserHistoryEntry.from_record(record))
-            for record in await connection.fetch(
+        self.history = UserHistory.from_records(
+            await connection.fetch(
                 'SELECT * FROM user_coins_graph_data WHERE user_id = $1 ORDER BY timestamp',
                 self.user_id,
             )
-        ]
+        )
         if not self.history:
             await self.update_history(connection=connection)
 
@@ -1393,6 +1449,28 @@ class UserRecord(BaseRecord):
         exp = round(exp * multiplier)
         await self.add(exp=exp, connection=connection)
 
+        return await self._notify_level_up(old, connection=connection)
+
+    async def add_rewards(
+        self, *, exp: int = 0, ctx: Context | None = None, connection: asyncpg.Connection | None = None, **values: int,
+    ) -> bool:
+        """Adds base exp (with multipliers applied) and any other column deltas in a single query.
+
+        Zero deltas are skipped. Return whether the user has leveled up.
+        """
+        if exp:
+            values['exp'] = round(exp * self.exp_multiplier_in_ctx(ctx))
+
+        values = {key: value for key, value in values.items() if value}
+        if not values:
+            return False
+
+        old = self.level
+        await self.add(connection=connection, **values)
+
+        return await self._notify_level_up(old, connection=connection)
+
+    async def _notify_level_up(self, old: int, *, connection: asyncpg.Connection | None = None) -> bool:
         if self.level > old:
             await self.notifications_manager.add_notification(
                 NotificationData.LevelUp(level=self.level),
@@ -1402,23 +1480,32 @@ class UserRecord(BaseRecord):
 
         return False
 
-    async def add_random_bank_space(self, minimum: int, maximum: int, *, chance: float = 1, connection: asyncpg.Connection | None = None) -> int:
+    def roll_bank_space(self, minimum: int, maximum: int, *, chance: float = 1) -> int:
+        """Rolls an amount of bank space to add, without adding it."""
         if random.random() > chance:
             return 0
 
-        amount = round(random.randint(minimum, maximum) * self.bank_space_growth_multiplier)
-        await self.add(max_bank=amount, connection=connection)
+        return round(random.randint(minimum, maximum) * self.bank_space_growth_multiplier)
+
+    async def add_random_bank_space(self, minimum: int, maximum: int, *, chance: float = 1, connection: asyncpg.Connection | None = None) -> int:
+        if amount := self.roll_bank_space(minimum, maximum, chance=chance):
+            await self.add(max_bank=amount, connection=connection)
         return amount
 
+    @staticmethod
+    def roll_exp(minimum: int, maximum: int, *, chance: float = 1) -> int:
+        """Rolls an amount of base experience to add, without adding it."""
+        if random.random() > chance:
+            return 0
+
+        return random.randint(minimum, maximum)
+
     async def add_random_exp(
         self, minimum: int, maximum: int, *, chance: float = 1,
         ctx: Context | None = None, connection: asyncpg.Connection | None = None,
     ) -> int:
-        if random.random() > chance:
-            return 0
-
-        amount = random.randint(minimum, maximum)
-        await self.add_exp(amount, ctx=ctx, connection=connection)
+        if amount := self.roll_exp(minimum, maximum, chance=chance):
+            await self.add_exp(amount, ctx=ctx, connection=connection)
         return amount
 
     async def make_dead(self, *, reason: str | None = None, connection: asyncpg.Connection | None = None) -> None:
@@ -1506,7 +1593,7 @@ class UserRecord(BaseRecord):
             'Base Multiplier',
             description='accumulated from using items like cheese',
         )
-        yield Multiplier(self.prestige * 0.25, f'{Emojis.get_prestige_emoji(self.prestige)} Prestige {self.prestige}')
+        yield Multiplier(self.prestige * 0.25, _prestige_multiplier_title(self.prestige))
 
         if self._cigarette_active:
             yield Multiplier(2, f'{Items.cigarette.emoji} Cigarette', expires_at=self.cigarette_expiry)
@@ -1542,7 +1629,7 @@ class UserRecord(BaseRecord):
         return 1 + sum(m.multiplier for m in self.walk_exp_multipliers(ctx))
 
     def walk_coin_multipliers(self, _ctx: Context | None = None) -> Generator[Multiplier, Any, Any]:
-        yield Multiplier(self.prestige * 0.25, f'{Emojis.get_prestige_emoji(self.prestige)} Prestige {self.prestige}')
+        yield Multiplier(self.prestige * 0.25, _prestige_multiplier_title(self.prestige))
 
         if self.alcohol_expiry is not None:
             yield Multiplier(0.25, f'{Items.alcohol.emoji} Alcohol', expires_at=self.alcohol_expiry)
@@ -1563,7 +1650,7 @@ class UserRecord(BaseRecord):
         return 1 + sum(m.multiplier for m in self.walk_coin_multipliers())
 
     def walk_bank_space_growth_multipliers(self) -> Generator[Multiplier, Any, Any]:
-        yield Multiplier(self.prestige * 0.5, f'{Emojis.get_prestige_emoji(self.prestige)} Prestige {self.prestige}')
+        yield Multiplier(self.prestige * 0.5, _prestige_multiplier_title(self.prestige))
 
     @property
     def bank_space_growth_multiplier(self) -> float:
@@ -1675,6 +1762,11 @@ class UserRecord(BaseRecord):
 
         return self.__notifications_manager
 
+    @property
+    def notifications_manager_if_loaded(self) -> NotificationsManager | None:
+        """Returns the notifications manager without creating (and fetching) one."""
+        return self.__notifications_manager
+
     @property
     def cooldown_manager(self) -> CooldownManager:
         if not self.__cooldown_manager:
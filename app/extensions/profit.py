@@ -6,8 +6,7 @@ import random
 from collections import defaultdict, deque
 from datetime import timedelta
 from html import unescape
-from textwrap import dedent
-from typing import Any, Generic, Literal, NamedTuple, Sequence, TypeVar, TYPE_CHECKING
+from typing import Any, Final, Generic, Literal, NamedTuple, Sequence, TypeVar, TYPE_CHECKING
 
 import discord
 from discord import app_commands
@@ -43,6 +42,16 @@ from config import Colors, Emojis
 if TYPE_CHECKING:
     from app.util.types import CommandResponse, TypedInteraction
 
+COIN_FORMAT: Final[str] = f'{Emojis.coin} **{{:,}}**'
+COIN_FORMAT_PLAIN: Final[str] = f'{Emojis.coin} {{:,}}'
+
+_rng = random.Random()
+_choice = _rng.choice
+_choices = _rng.choices
+_randint = _rng.randint
+_random = _rng.random
+_uniform = _rng.uniform
+
 
 class SearchArea(NamedTuple):
     minimum: int
@@ -223,11 +232,13 @@ class Profit(Cog):
         "Bill Clinton",
         'Dwayne "The Rock" Johnson',
     )
+    # (person, capitalized person) pairs, so that sentences starting with a person need no capitalization at runtime
+    _BEG_PEOPLE_PAIRS = tuple((person, person[0].upper() + person[1:]) for person in BEG_PEOPLE)
 
     BEG_FAIL_MESSAGES = (
-        "lol! {} didn't give you anything because they didn't feel like it.",
-        "funny, {} told you to get a job.",
-        "ouch, {} simply denied your request.",
+        "Lol! {} didn't give you anything because they didn't feel like it.",
+        "Funny, {} told you to get a job.",
+        "Ouch, {} simply denied your request.",
         "{} does not give to homeless people. Kinda rude wouldn't you say?",
         "{}: go away you filthy beggar!",
         "{}: I don't have money either...",
@@ -250,6 +261,10 @@ class Profit(Cog):
         "{1} just fell from the sky. Just kidding, {0} gave it to you.",
         "After a bit of consideration, {0} finally decides to give you {1}.",
     )
+    # Messages starting with the person take the capitalized person ({2}) instead
+    _BEG_SUCCESS_TEMPLATES = tuple(
+        '{2}' + message[3:] if message.startswith('{0}') else message for message in BEG_SUCCESS_MESSAGES
+    )
 
     BEG_ITEMS = {
         Items.stick: 0.1,
@@ -261,13 +276,6 @@ class Profit(Cog):
         Items.nineteen_dollar_fortnite_card: 0.001,
     }
 
-    @staticmethod
-    def _capitalize_first(s: str, /) -> str:
-        if not len(s):
-            return s
-
-        return s[0].upper() + s[1:]
-
     _SHORTCUT_CANDIDATES: list[str] = ['beg', 'search', 'hunt', 'trivia', 'fish']
     _COOLDOWN_ONLY_CANDIDATES: list[str] = ['hourly', 'daily', 'weekly']
     _TOOL_MAPPING: dict[Item | tuple[Item, ...], str] = {
@@ -353,27 +361,28 @@ class Profit(Cog):
 
         There is a chance that you can get nothing, and a small chance that you can obtain some items.
         """
-        yield f"{Emojis.loading} {random.choice(self.BEG_INITIAL_MESSAGES)}", REPLY
-        person = random.choice(self.BEG_PEOPLE)
+        yield f"{Emojis.loading} {_choice(self.BEG_INITIAL_MESSAGES)}", REPLY
+        person, capitalized_person = _choice(self._BEG_PEOPLE_PAIRS)
 
         embed = discord.Embed(timestamp=ctx.now)
         embed.set_author(name=f"Beg: {ctx.author}", icon_url=ctx.author.display_avatar)
 
-        await asyncio.sleep(random.uniform(2, 4))
+        await asyncio.sleep(_uniform(2, 4))
 
         record = await ctx.db.get_user_record(ctx.author.id)
         view = await self._get_command_shortcuts(ctx, record)
-        await record.add_random_exp(4, 7, ctx=ctx)
-        await record.add_random_bank_space(10, 15, chance=0.45)
+        async with ctx.db.acquire() as conn:
+            await record.add_random_exp(4, 7, ctx=ctx, connection=conn)
+            await record.add_random_bank_space(10, 15, chance=0.45, connection=conn)
 
-        if random.random() < 0.4:
+        if _random() < 0.4:
             embed.colour = Colors.error
-            embed.description = self._capitalize_first(random.choice(self.BEG_FAIL_MESSAGES).format(f'**{person}**'))
+            embed.description = _choice(self.BEG_FAIL_MESSAGES).format(f'**{person}**')
 
             yield '', embed, view, EDIT
             return
 
-        base = random.randint(150, 450)
+        base = _randint(150, 450)
         multiplier = 1
         multiplier_text = []
         item_chance = 0.06
@@ -404,18 +413,16 @@ class Profit(Cog):
 
         async with ctx.db.acquire() as conn:
             profit = await record.add_coins(base * multiplier, connection=conn)
-            message = f'{Emojis.coin} **{profit:,}**'
+            message = COIN_FORMAT.format(profit)
 
-            if random.random() < item_chance:
-                item = random.choices(list(self.BEG_ITEMS), list(self.BEG_ITEMS.values()))[0]
+            if _random() < item_chance:
+                item = _choices(list(self.BEG_ITEMS), list(self.BEG_ITEMS.values()))[0]
 
                 message += f' and {item.get_sentence_chunk(1)}'
                 await record.inventory_manager.add_item(item, 1, connection=conn)
 
         embed.colour = Colors.success
-        embed.description = self._capitalize_first(
-            random.choice(self.BEG_SUCCESS_MESSAGES).format(person, message)
-        )
+        embed.description = _choice(self._BEG_SUCCESS_TEMPLATES).format(person, message, capitalized_person)
 
         button = discord.ui.Button(label='View Breakdown', emoji='\U0001f4b0', style=discord.ButtonStyle.primary)
 
@@ -445,38 +452,35 @@ class Profit(Cog):
         not applied to this command.
         """
         record = await ctx.db.get_user_record(ctx.author.id)
-        await record.add_random_exp(4, 7, ctx=ctx)
-        await record.add_random_bank_space(10, 15, chance=0.45)
-        await record.add(wallet=-amount)
+        async with ctx.db.acquire() as conn:
+            await record.add_random_exp(4, 7, ctx=ctx, connection=conn)
+            await record.add_random_bank_space(10, 15, chance=0.45, connection=conn)
+            await record.add(wallet=-amount, connection=conn)
 
-        def make_embed(c: int = Colors.primary) -> discord.Embed:
-            e = discord.Embed(timestamp=ctx.now, color=c)
-            # noinspection PyTypeChecker
-            e.set_author(name=f"{ctx.author.name}'s Investment", icon_url=ctx.author.avatar)
-            return e
+        embed = discord.Embed(timestamp=ctx.now, color=Colors.primary, description=f'{Emojis.loading} Investing...')
+        embed.set_author(name=f"{ctx.author.name}'s Investment", icon_url=ctx.author.display_avatar.url)
+        embed.add_field(name="Earnings", value='', inline=False)
+        embed.add_field(name="Total Return", value='')
 
         multiplier = 0
         yield f'{Emojis.loading} Please wait...', REPLY
 
         for _ in range(5):
-            if random.random() > 0.15:
-                multiplier += random.uniform(.13, .19)
-
-                embed = make_embed()
-                embed.description = f'{Emojis.loading} Investing...'
-
-                embed.add_field(name="Earnings", value=dedent(f"""
-                    {multiplier:,.1%} of initial value
-                    {Emojis.Expansion.standalone} {Emojis.coin} +{round(amount * multiplier):,}
-                """), inline=False)
+            if _random() > 0.15:
+                multiplier += _uniform(.13, .19)
 
-                embed.add_field(name="Total Return", value=f"{Emojis.coin} {amount * (1 + multiplier):,.0f}")
+                embed.set_field_at(0, name="Earnings", value=(
+                    f'{multiplier:,.1%} of initial value\n'
+                    f'{Emojis.Expansion.standalone} {Emojis.coin} +{round(amount * multiplier):,}'
+                ), inline=False)
+                embed.set_field_at(1, name="Total Return", value=f"{Emojis.coin} {amount * (1 + multiplier):,.0f}")
 
                 yield embed, EDIT
 
             else:
-                embed = make_embed(Colors.error)
+                embed.colour = Colors.error
                 embed.description = "You failed to invest properly. Lol."
+                embed.clear_fields()
 
                 yield "", embed, EDIT
                 return
@@ -485,15 +489,14 @@ class Profit(Cog):
 
         profit = await record.add_coins(round(amount * (1 + multiplier)))
 
-        embed = make_embed(Colors.success)
+        embed.colour = Colors.success
         embed.description = 'Success! Your investment succeeded.'
 
-        embed.add_field(name="Earnings", value=dedent(f"""
-            {multiplier:,.1%} of initial value
-            {Emojis.Expansion.standalone} {Emojis.coin} +{amount * multiplier:,.0f}
-        """), inline=False)
-
-        embed.add_field(name="Total Return", value=f"{Emojis.coin} {profit:,}")
+        embed.set_field_at(0, name="Earnings", value=(
+            f'{multiplier:,.1%} of initial value\n'
+            f'{Emojis.Expansion.standalone} {Emojis.coin} +{amount * multiplier:,.0f}'
+        ), inline=False)
+        embed.set_field_at(1, name="Total Return", value=COIN_FORMAT_PLAIN.format(profit))
         yield "", embed, EDIT
 
     SEARCH_AREAS = {
@@ -665,8 +668,9 @@ class Profit(Cog):
             return
 
         record = await ctx.db.get_user_record(ctx.author.id)
-        await record.add_random_exp(10, 16, ctx=ctx)
-        await record.add_random_bank_space(18, 24, chance=0.6)
+        async with ctx.db.acquire() as conn:
+            await record.add_random_exp(10, 16, ctx=ctx, connection=conn)
+            await record.add_random_bank_space(18, 24, chance=0.6, connection=conn)
 
         name, choice = view.choice
         embed = discord.Embed(timestamp=ctx.now)
@@ -685,11 +689,11 @@ class Profit(Cog):
         weights[None] *= 1 - accumulated
         cont = await self._get_command_shortcuts(ctx, record)
 
-        if random.random() > choice.success_chance:
+        if _random() > choice.success_chance:
             embed.colour = Colors.error
 
-            if random.random() < choice.death_chance_if_fail:
-                cause = random.choice(choice.death_responses)
+            if _random() < choice.death_chance_if_fail:
+                cause = _choice(choice.death_responses)
                 await record.make_dead(reason=f'While searching for coins, {cause}')
 
                 embed.add_field(name='You died!', value=cause)
@@ -697,26 +701,26 @@ class Profit(Cog):
                 yield embed, cont, REPLY
                 return
 
-            message = random.choice(choice.failure_responses)
+            message = _choice(choice.failure_responses)
             embed.add_field(name='You found nothing!', value=message)
 
             yield embed, cont, REPLY
             return
 
-        gain = random.randint(choice.minimum, choice.maximum)
+        gain = _randint(choice.minimum, choice.maximum)
         if cow := pets.get_active_pet(Pets.cow):
             gain += gain * (0.02 + cow.level * 0.005)
 
         async with ctx.db.acquire() as conn:
             profit = await record.add_coins(gain, connection=conn)
-            message = f'{Emojis.coin} **{profit:,}**'
+            message = COIN_FORMAT.format(profit)
 
-            if item := random.choices(list(weights), weights=list(weights.values()))[0]:
+            if item := _choices(list(weights), weights=list(weights.values()))[0]:
                 message += f' and {item.get_sentence_chunk(1)}'
                 await record.inventory_manager.add_item(item, 1, connection=conn)
 
         embed.colour = Colors.success
-        embed.add_field(name='Profit!', value=random.choice(choice.success_responses).format(message))
+        embed.add_field(name='Profit!', value=_choice(choice.success_responses).format(message))
 
         yield embed, cont, REPLY
 
@@ -882,7 +886,7 @@ class Profit(Cog):
 
         async with ctx.db.acquire() as conn:
             profit = await record.add_coins(gain, connection=conn)
-            message = [f'{Emojis.coin} **{profit:,}**']
+            message = [COIN_FORMAT.format(profit)]
 
             if random.random() < choice.item_chance:
                 items = random.choices(list(choice.items), list(choice.items.values()), k=random.randint(*choice.item_count))
@@ -1242,7 +1246,7 @@ class Profit(Cog):
 
         embed.add_field(name='Difficulty', value=question.difficulty.title())
         embed.add_field(name='Category', value=question.category)
-        embed.add_field(name='Prize', value=f'{Emojis.coin} **{prize:,}**')
+        embed.add_field(name='Prize', value=COIN_FORMAT.format(prize))
 
         view = TriviaView(ctx, embed, question)
         yield embed, view, REPLY
@@ -2280,7 +2284,7 @@ class DivingView(UserView):
         profit = random.randint(100, 250)
         self._profit += profit
 
-        found = f'{Emojis.coin} **{profit:,}**'
+        found = COIN_FORMAT.format(profit)
 
         if random.random() < 0.2:  # item chance. this number will change based on submarine
             item = random.choices(list(self.ITEMS.keys()), weights=list(self.ITEMS.values()))[0]
@@ -4,7 +4,7 @@ import asyncio
 import datetime
 import random
 from textwrap import dedent
-from typing import Any, TYPE_CHECKING
+from typing import Any, Final, TYPE_CHECKING
 
 import discord
 from discord import app_commands
@@ -22,6 +22,12 @@ from config import Colors, Emojis
 if TYPE_CHECKING:
     from app.database import SkillInfo, UserRecord
 
+# ordered the same way query_collection_many orders an empty query
+SKILL_CHOICES: Final[dict[str, app_commands.Choice[str]]] = {
+    skill.key: app_commands.Choice(name=skill.name, value=skill.key)
+    for skill in sorted(walk_collection(Skills, SkillObject), key=lambda skill: len(skill.key))
+}
+
 
 class Skill(Cog):
     """Commands for the skill and training system."""
@@ -238,11 +244,9 @@ class Skill(Cog):
         finally:
             await skills.add_skill_cooldown(skill, datetime.timedelta(seconds=skill.training_cooldown))
 
+        # this updates skill_record in place
         await skills.add_skill_points(skill, 1)
 
-        # it doesn't update in place due to the fact that they're namedtuples
-        skill_record = skills.get_skill(skill)
-
         embed = discord.Embed(color=Colors.success, timestamp=ctx.now)
         embed.set_author(name='Training Successful', icon_url=ctx.author.display_avatar)
         embed.set_thumbnail(url=image_url_from_emoji(skill.emoji))
@@ -260,11 +264,10 @@ class Skill(Cog):
     @skills_buy.autocomplete('skill')
     @train.autocomplete('skill')
     async def autocomplete_skill(self, _, current: str):
-        current = current.lower()
-        return [
-            app_commands.Choice(name=skill.name, value=skill.key)
-            for skill in query_collection_many(Skills, SkillObject, current)
-        ]
+        if not current:
+            return list(SKILL_CHOICES.values())
+
+        return [SKILL_CHOICES[skill.key] for skill in query_collection_many(Skills, SkillObject, current)]
 
 
 setup = Skill.simple_setup
@@ -1,10 +1,12 @@
 from __future__ import annotations
 
-from bisect import bisect_left
+import heapq
+import time
 from datetime import datetime, timedelta
+from functools import lru_cache
 from io import BytesIO
 from textwrap import dedent
-from typing import Any, Iterable, Literal, TYPE_CHECKING
+from typing import Any, Final, Iterable, Literal, TYPE_CHECKING
 
 import discord
 from discord import app_commands
@@ -15,8 +17,8 @@ from PIL import Image
 from app import Bot
 from app.core import BAD_ARGUMENT, Cog, Context, HybridContext, NO_EXTRA, REPLY, command, group, simple_cooldown
 from app.core.flags import Flags, flag, store_true
-from app.data.items import ItemType, Items
-from app.database import InventoryManager, Multiplier, UserHistoryEntry, UserRecord
+from app.data.items import ALL_ITEMS, Item, ItemRarity, ItemType
+from app.database import InventoryManager, Multiplier, UserRecord
 from app.extensions.transactions import query_item_type
 from app.util.common import cutoff, humanize_duration, image_url_from_emoji, progress_bar
 from app.util.converters import CaseInsensitiveMemberConverter, IntervalConverter
@@ -30,30 +32,63 @@ if TYPE_CHECKING:
     from app.util.types import CommandResponse, TypedInteraction
 
 
+LEADERBOARD_LIMIT: Final[int] = 100
+LEADERBOARD_CACHE_TTL: Final[float] = 10.0
+LEADERBOARD_MEDALS: Final[tuple[str, str, str]] = ('\U0001f3c6', '\U0001f948', '\U0001f949')
+LEADERBOARD_BULLET: Final[str] = '<:bullet:934890293902327838>'
+GUILD_GRAPH_RESOLUTION: Final[int] = 200
+
+BALANCE_TEMPLATE: Final[str] = dedent("""
+    - Wallet: {coin} **{wallet:,}**
+    - Bank: {coin} **{bank:,}**/{max_bank:,} *[{bank_ratio:.1%}]*
+    - Total: {coin} **{total:,}**
+""")
+INVENTORY_TEMPLATE: Final[str] = dedent("""
+    {whose} inventory is worth {coin} **{worth:,}**.
+    Additionally, {owner} own **{owned:,}** out of {total:,} unique items.
+""")
+
+
+def _render_graph_background() -> bytes:
+    with Image.new("RGB", (30, 30), (0, 0, 0)) as background:
+        buffer = BytesIO()
+        background.save(buffer, format="PNG")
+        return buffer.getvalue()
+
+
+GRAPH_BACKGROUND: Final[bytes] = _render_graph_background()
+
+
+def _bucket_items_by_rarity(items: tuple[Item, ...]) -> dict[str, tuple[Item, ...]]:
+    buckets: dict[str, list[Item]] = {rarity.name: [] for rarity in ItemRarity}
+    for item in items:
+        buckets[item.rarity.name].append(item)
+
+    return {'all': items, **{rarity: tuple(bucket) for rarity, bucket in buckets.items()}}
+
+
+# keyed on the name itself, so renamed members simply miss the cache
+@lru_cache(maxsize=4096)
+def _escape_name(name: str) -> str:
+    return discord.utils.escape_markdown(name)
+
+
 class LeaderboardFormatter(Formatter[tuple[UserRecord, discord.Member]]):
     async def format_page(self, paginator: Paginator, entries: list[tuple[UserRecord, discord.Member]]) -> discord.Embed:
-        result = []
-
-        for i, (record, member) in enumerate(entries, start=paginator.current_page * 10):
-            match i:
-                case 0:
-                    start = '\U0001f3c6'
-                case 1:
-                    start = '\U0001f948'
-                case 2:
-                    start = '\U0001f949'
-                case _:
-                    start = '<:bullet:934890293902327838>'
-
-            record: UserRecord
-            result.append(
-                f'{start} {Emojis.coin} **{record.wallet:,}** \u2014 '
-                f'{discord.utils.escape_markdown(str(member))} {Emojis.get_prestige_emoji(record.prestige)}'
-            )
+        coin = Emojis.coin
+        get_prestige_emoji = Emojis.get_prestige_emoji
+        escape_name = _escape_name
+
+        description = '\n'.join(
+            f'{LEADERBOARD_MEDALS[i] if i < 3 else LEADERBOARD_BULLET} {coin} **{record.wallet:,}** \u2014 '
+            f'{escape_name(str(member))} {get_prestige_emoji(record.prestige)}'
+            for i, (record, member) in enumerate(entries, start=paginator.current_page * 10)
+        )
 
-        embed = discord.Embed(color=Colors.primary, description='\n'.join(result), timestamp=paginator.ctx.now)
+        ctx = paginator.ctx
+        embed = discord.Embed(color=Colors.primary, description=description, timestamp=ctx.now)
         # noinspection PyTypeChecker
-        embed.set_author(name=f'Leaderboard: {paginator.ctx.guild.name}', icon_url=paginator.ctx.guild.icon)
+        embed.set_author(name=f'Leaderboard: {ctx.guild.name}', icon_url=ctx.guild.icon)
         embed.set_footer(text=f'Page {paginator.current_page + 1}/{paginator.max_pages}')
 
         return embed
@@ -114,6 +149,8 @@ class Stats(Cog):
 
     emoji = '\U0001f4ca'
 
+    _ITEMS_BY_RARITY: dict[str, tuple[Item, ...]] = _bucket_items_by_rarity(ALL_ITEMS)
+
     def __init__(self, bot: Bot) -> None:
         super().__init__(bot)
 
@@ -121,6 +158,8 @@ class Stats(Cog):
             name='View Balance', callback=self._balance_context_menu_callback,
         )
         bot.tree.add_command(self._balance_context_menu)
+        # guild_id: (monotonic timestamp, leaderboard entries)
+        self._leaderboard_cache: dict[int, tuple[float, list[tuple[UserRecord, discord.Member]]]] = {}
 
     async def cog_unload(self) -> None:
         self.bot.tree.remove_command(self._balance_context_menu.name, type=self._balance_context_menu.type)
@@ -132,23 +171,23 @@ class Stats(Cog):
         prestige_text = (
             f'{Emojis.get_prestige_emoji(data.prestige)} Prestige {data.prestige}' if data.prestige else 'Coins'
         )
+        wallet, bank = data.wallet, data.bank
         embed.set_author(name=f"Balance: {user}", icon_url=user.avatar)
-        embed.add_field(name=prestige_text, value=dedent(f"""
-            - Wallet: {Emojis.coin} **{data.wallet:,}**
-            - Bank: {Emojis.coin} **{data.bank:,}**/{data.max_bank:,} *[{data.bank_ratio:.1%}]*
-            - Total: {Emojis.coin} **{data.wallet + data.bank:,}**
-        """))
+        embed.add_field(name=prestige_text, value=BALANCE_TEMPLATE.format(
+            coin=Emojis.coin, wallet=wallet, bank=bank, max_bank=data.max_bank, bank_ratio=data.bank_ratio,
+            total=wallet + bank,
+        ))
         embed.set_thumbnail(url=user.avatar)
 
         transactions: Transactions = self.bot.get_cog('Transactions')  # type: ignore
         view = discord.ui.View(timeout=60)
         view.add_item(ModalButton(
             modal=transactions.withdraw_modal, label='Withdraw Coins', style=discord.ButtonStyle.primary,
-            disabled=not data.bank,
+            disabled=not bank,
         ))
         view.add_item(ModalButton(
             modal=transactions.deposit_modal, label='Deposit Coins', style=discord.ButtonStyle.primary,
-            disabled=not data.wallet,
+            disabled=not wallet,
         ))
         view.add_item(RefreshBalanceButton(self, user=user, record=data, color=color))
         return embed, view
@@ -253,24 +292,34 @@ class Stats(Cog):
         - This leaderboard is for *guild only*.
         - This leaderboard only shows *cached users*: if a user has not used the bot since the last startup, they will not be shown here.
         - This leaderboard shows the richest users by their *wallet.*
+        - Only the top 100 users are shown.
 
         This is prone to change in the future when flags are implemented. For now, there are limitations.
         """
+        now = time.monotonic()
+        entry = self._leaderboard_cache.get(ctx.guild.id)
+        if entry is not None and now - entry[0] < LEADERBOARD_CACHE_TTL:
+            return Paginator(ctx, LeaderboardFormatter(entry[1], per_page=10), timeout=120), REPLY
+
         members = ctx.guild._members
+        user_records = ctx.db.user_records
 
-        records = sorted(
-            (
-                (record, ctx.guild.get_member(key))
-                for key, record in ctx.db.user_records.items()
-                if key in members and record.wallet
-            ),
-            key=lambda r: r[0].wallet,
-            reverse=True,
+        # the record cache spans every guild, so probe it per member
+        records = heapq.nlargest(
+            LEADERBOARD_LIMIT,
+            (record for key in members if (record := user_records.get(key)) is not None and record.wallet),
+            key=lambda record: record.wallet,
         )
+        records = [(record, members[record.user_id]) for record in records]
 
         if not records:
             return "I don't see anyone in the cache that's in this server."
 
+        cache = self._leaderboard_cache
+        for guild_id in [guild_id for guild_id, (stored, _) in cache.items() if now - stored >= LEADERBOARD_CACHE_TTL]:
+            del cache[guild_id]
+
+        cache[ctx.guild.id] = now, records
         return Paginator(ctx, LeaderboardFormatter(records, per_page=10), timeout=120), REPLY
 
     @staticmethod
@@ -283,14 +332,14 @@ class Stats(Cog):
             'inline': False,
         } for item, quantity in inventory.cached.items() if quantity]
 
-        worth = sum(item.price * quantity for item, quantity in inventory.cached.items())
+        worth = inventory.cached.total_worth
 
         embed = discord.Embed(color=color, timestamp=ctx.now)
-        owner = 'you' if user == ctx.author else 'they'
-        embed.description = dedent(f"""
-            {'Your' if user == ctx.author else f"{user.name}'s"} inventory is worth {Emojis.coin} **{worth:,}**.
-            Additionally, {owner} own **{len(fields):,}** out of {len(list(Items.all())):,} unique items.
-        """)
+        is_author = user == ctx.author
+        embed.description = INVENTORY_TEMPLATE.format(
+            whose='Your' if is_author else f"{user.name}'s", coin=Emojis.coin, worth=worth,
+            owner='you' if is_author else 'they', owned=len(fields), total=len(ALL_ITEMS),
+        )
         embed.set_author(name=f'{user.name}\'s Inventory', icon_url=user.display_avatar)
 
         go_shopping = StaticCommandButton(
@@ -314,7 +363,7 @@ class Stats(Cog):
         record = await ctx.db.get_user_record(user.id)
         inventory = await record.inventory_manager.wait()
 
-        if all(not quantity for item, quantity in inventory.cached.items()):
+        if not inventory.cached.owned_count:
             return f'{"You currently do" if user == ctx.author else f"{user.name} currently does"} not own any items.', REPLY
 
         paginator = self._refresh_inventory_paginator(ctx, user, inventory, Colors.primary)
@@ -340,22 +389,24 @@ class Stats(Cog):
 
         rarity = rarity.lower()
 
-        lines = [
-            f'{item.get_display_name(bold=quantity(item) > 0)} ({item.rarity.name.title()}) x{quantity(item):,}'
-            for item in Items.all()
-            if rarity in ('all', item.rarity.name.lower())
-            and (category is None or item.type is category)
-        ]
+        lines = []
+        count = inventory.cached.owned_count
+        rarity_count = 0
 
-        count = sum(quantity > 0 for quantity in inventory.cached.values())
+        # Rarity names are already lowercase
+        for item in self._ITEMS_BY_RARITY[rarity]:
+            owned = quantity(item)
+            rarity_count += owned > 0
+
+            if category is None or item.type is category:
+                lines.append(f'{item.get_display_name(bold=owned > 0)} ({item.rarity.name.title()}) x{owned:,}')
 
         embed = discord.Embed(color=Colors.primary, timestamp=ctx.now)
         embed.set_author(name=f'{ctx.author.name}\'s Item Book', icon_url=ctx.author.display_avatar)
-        embed.description = f'You own **{count:,}** out of {len(list(Items.all())):,} unique items.'
+        embed.description = f'You own **{count:,}** out of {len(ALL_ITEMS):,} unique items.'
 
         if rarity != 'all':
-            count = sum(quantity > 0 for item, quantity in inventory.cached.items() if item.rarity.name.lower() == rarity)
-            embed.description += f'\nYou have also discovered {count:,} out of {len(lines):,} **{rarity.lower()}** items.'
+            embed.description += f'\nYou have also discovered {rarity_count:,} out of {len(lines):,} **{rarity}** items.'
 
         return Paginator(ctx, LineBasedFormatter(embed, lines, field_name='\u200b'), timeout=120), REPLY
 
@@ -380,7 +431,8 @@ class Stats(Cog):
         record = await ctx.db.get_user_record(ctx.author.id)
         notifications = await record.notifications_manager.wait()
 
-        await record.update(unread_notifications=0)
+        if record.unread_notifications:
+            await record.update(unread_notifications=0)
 
         fields = [{
             'name': (
@@ -408,7 +460,7 @@ class Stats(Cog):
     @simple_cooldown(2, 3)
     async def notifs_view(self, ctx: Context, index: int) -> tuple[discord.Embed | str, Any]:
         """View information on a specific notification."""
-        if index < -1:
+        if index < 1:
             return 'Notification index must be positive.', BAD_ARGUMENT
 
         record = await ctx.db.get_user_record(ctx.author.id)
@@ -432,11 +484,18 @@ class Stats(Cog):
     @simple_cooldown(1, 10)
     async def notifs_clear(self, ctx: Context) -> tuple[str, Any]:
         """Clear all of your notifications."""
-        await ctx.db.execute('DELETE FROM notifications WHERE user_id = $1', ctx.author.id)
-
         record = await ctx.db.get_user_record(ctx.author.id)
-        notifications = await record.notifications_manager.wait()
-        notifications.cached.clear()
+        # don't fetch notifications that are about to be deleted
+        if notifications := record.notifications_manager_if_loaded:
+            await notifications.wait()
+
+        async with ctx.db.acquire() as conn, conn.transaction():
+            await conn.execute('DELETE FROM notifications WHERE user_id = $1', ctx.author.id)
+            if record.unread_notifications:
+                await record.update(unread_notifications=0, connection=conn)
+
+        if notifications:
+            notifications.cached.clear()
 
         return 'Cleared all of your notifications.', REPLY
 
@@ -460,22 +519,20 @@ class Stats(Cog):
 
         record = await ctx.db.get_user_record(ctx.author.id)
 
-        threshold = ctx.now - flags.duration
-        position = bisect_left(record.history, threshold, key=lambda entry: entry[0])
-        history = record.history[position:]
-        if not history:
+        dates, wallet, total = record.history.since(ctx.now - flags.duration)
+        if not dates:
             return 'No data to graph. Try specifying a larger timespan.', REPLY
 
-        history.append((ctx.now, UserHistoryEntry(record.wallet, record.total_coins)))
-        dates, values = zip(*history)
-        wallet, total = zip(*values)
-        values = total if flags.total else wallet  # This could be compressed into zip(*values)[flags.total]
+        dates.append(ctx.now)
+        if flags.total:
+            values = total
+            values.append(record.total_coins)
+        else:
+            values = wallet
+            values.append(record.wallet)
         target = 'Total Coins' if flags.total else 'Coins in Wallet'
 
-        with Image.new("RGB", (30, 30), (0, 0, 0)) as background:
-            buffer = BytesIO()
-            background.save(buffer, format="PNG")
-            buffer.seek(0)
+        buffer = BytesIO(GRAPH_BACKGROUND)
 
         color = discord.Color.from_rgb(255, 255, 255)
         await send_graph_to(
@@ -498,21 +555,32 @@ class Stats(Cog):
         if flags.duration and flags.duration < timedelta(minutes=2):
             return 'You must graph at least 2 minutes of data.', BAD_ARGUMENT
 
+        # Bucket the data in SQL so that at most GUILD_GRAPH_RESOLUTION points are transferred
+        query = """
+                SELECT to_timestamp(floor(extract(epoch FROM timestamp) / width) * width) AS bucket,
+                       MAX(guild_count) AS guild_count
+                FROM guild_count_graph_data, (
+                    SELECT GREATEST(extract(epoch FROM MAX(timestamp) - MIN(timestamp)) / $2, 1) AS width
+                    FROM guild_count_graph_data WHERE timestamp >= $1
+                ) AS bounds
+                WHERE timestamp >= $1
+                GROUP BY bucket
+                ORDER BY bucket
+                """
         entries = await ctx.db.fetch(
-            'SELECT guild_count, timestamp FROM guild_count_graph_data WHERE timestamp >= $1 ORDER BY timestamp',
+            query,
             ctx.now - flags.duration if flags.duration else datetime.utcfromtimestamp(0),
+            GUILD_GRAPH_RESOLUTION,
         )
         if not entries:
             return 'No data to graph. Try specifying a larger timespan.', REPLY
 
-        history = [(entry['timestamp'], entry['guild_count']) for entry in entries]
-        history.append((ctx.now, current := len(ctx.bot.guilds)))
+        dates = [entry['bucket'] for entry in entries]
+        values = [entry['guild_count'] for entry in entries]
+        dates.append(ctx.now)
+        values.append(current := len(ctx.bot.guilds))
 
-        dates, values = zip(*history)
-        with Image.new("RGB", (30, 30), (0, 0, 0)) as background:
-            buffer = BytesIO()
-            background.save(buffer, format="PNG")
-            buffer.seek(0)
+        buffer = BytesIO(GRAPH_BACKGROUND)
 
         color = discord.Color.from_rgb(255, 255, 255)
         label = f'the past {humanize_duration(flags.duration.total_seconds())}' if flags.duration else 'time'
@@ -532,10 +600,14 @@ class Stats(Cog):
     @Cog.listener('on_guild_join')
     @Cog.listener('on_guild_remove')
     async def update_guild_count(self, _) -> None:
-        await self.bot.db.execute(
-            'INSERT INTO guild_count_graph_data (guild_count) VALUES ($1)',
-            len(self.bot.guilds),
-        )
+        # Skip the write if the guild count has not changed since the latest entry
+        query = """
+                INSERT INTO guild_count_graph_data (guild_count)
+                SELECT $1::INTEGER WHERE $1::INTEGER IS DISTINCT FROM (
+                    SELECT guild_count FROM guild_count_graph_data ORDER BY timestamp DESC LIMIT 1
+                )
+                """
+        await self.bot.db.execute(query, len(self.bot.guilds))
 
 
 setup = Stats.simple_setup
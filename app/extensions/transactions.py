@@ -5,7 +5,7 @@ import datetime
 from collections import defaultdict
 from functools import partial
 from textwrap import dedent
-from typing import Any, Callable, Literal, NamedTuple, ValuesView, TYPE_CHECKING, TypeAlias
+from typing import Any, Callable, Final, Literal, NamedTuple, ValuesView, TYPE_CHECKING, TypeAlias
 
 import discord
 from discord import app_commands
@@ -25,7 +25,7 @@ from app.core import (
     user_max_concurrency,
 )
 from app.core.flags import Flags, store_true
-from app.data.items import Item, ItemRarity, ItemType, Items
+from app.data.items import ALL_ITEMS, Item, ItemRarity, ItemType, Items
 from app.data.pets import Pets
 from app.data.recipes import Recipe, Recipes
 from app.database import InventoryManager, NotificationData, UserRecord
@@ -312,6 +312,10 @@ else:
 TITLE = 0
 DESCRIPTION = 1
 
+SHOP_ENTRIES: Final[tuple[tuple[Item, str], ...]] = tuple(
+    (item, cutoff(item.brief, max_length=100)) for item in walk_collection(Items, Item) if item.buyable
+)
+
 
 def shop_paginator(
     ctx: Context,
@@ -323,12 +327,18 @@ def shop_paginator(
 ) -> Paginator:
     fields = []
     embed = discord.Embed(color=Colors.primary, timestamp=ctx.now)
+    embed.set_author(name='Item Shop', icon_url=ctx.author.display_avatar)
+    embed.description = (
+        f'To buy an item, use `{ctx.clean_prefix}buy`.\n'
+        f'To view information on an item, use `{ctx.clean_prefix}shop <item>`.'
+    )
+
     query = query and query.lower()
     offset = query and len(query)
+    wallet = record.wallet
+    quantity_of = inventory.cached.quantity_of
 
-    for i in walk_collection(Items, Item):
-        if not i.buyable:
-            continue
+    for i, description in SHOP_ENTRIES:
         if type is not None and i.type is not type:
             continue
 
@@ -343,18 +353,10 @@ def shop_paginator(
             else:
                 continue
 
-        embed.set_author(name='Item Shop', icon_url=ctx.author.display_avatar)
-        embed.description = (
-            f'To buy an item, use `{ctx.clean_prefix}buy`.\n'
-            f'To view information on an item, use `{ctx.clean_prefix}shop <item>`.'
-        )
-
-        comment = '*You cannot afford this item.*\n' if i.price > record.wallet else ''
-        owned = inventory.cached.quantity_of(i)
+        comment = '*You cannot afford this item.*\n' if i.price > wallet else ''
+        owned = quantity_of(i)
         owned = f'(You own {owned:,})' if owned else ''
 
-        description = cutoff(i.brief, max_length=100)
-
         end = loc and loc + offset
         name = i.name
 
@@ -404,7 +406,7 @@ class ShopCategorySelect(discord.ui.Select):
         *(
             discord.SelectOption(label=category.name.title(), value=str(category.value))
             for category in walk_collection(ItemType, ItemType)
-            if any(item.type is category and item.buyable for item in walk_collection(Items, Item))
+            if any(item.type is category for item, _ in SHOP_ENTRIES)
         ),
         discord.SelectOption(label='Search...', value='search'),
     ]
@@ -536,17 +538,16 @@ class Transactions(Cog):
         """Withdraw coins from your bank."""
         data = await ctx.db.get_user_record(ctx.author.id)
 
-        async with ctx.typing():
-            await data.add(wallet=amount, bank=-amount)
+        await data.add(wallet=amount, bank=-amount)
 
         embed = discord.Embed(color=Colors.primary)
         embed.set_author(name=f"Successful Transaction: {ctx.author}", icon_url=ctx.author.avatar)
 
         embed.description = f"Withdrew {Emojis.coin} **{amount:,}** from your bank."
-        embed.add_field(name="Updated Balance", value=dedent(f"""
-            Wallet: {Emojis.coin} **{data.wallet:,}**
-            Bank: {Emojis.coin} **{data.bank:,}**
-        """))
+        embed.add_field(
+            name="Updated Balance",
+            value=f'Wallet: {Emojis.coin} **{data.wallet:,}**\nBank: {Emojis.coin} **{data.bank:,}**',
+        )
 
         view = discord.ui.View(timeout=60)
         view.add_item(ModalButton(
@@ -568,17 +569,16 @@ class Transactions(Cog):
         """Deposit coins from your wallet into your bank."""
         data = await ctx.db.get_user_record(ctx.author.id)
 
-        async with ctx.typing():
-            await data.add(wallet=-amount, bank=amount)
+        await data.add(wallet=-amount, bank=amount)
 
         embed = discord.Embed(color=Colors.primary)
         embed.set_author(name=f"Successful Transaction: {ctx.author}", icon_url=ctx.author.avatar)
 
         embed.description = f"Deposited {Emojis.coin} **{amount:,}** into your bank."
-        embed.add_field(name="Updated Balance", value=dedent(f"""
-            Wallet: {Emojis.coin} **{data.wallet:,}**
-            Bank: {Emojis.coin} **{data.bank:,}**
-        """))
+        embed.add_field(
+            name="Updated Balance",
+            value=f'Wallet: {Emojis.coin} **{data.wallet:,}**\nBank: {Emojis.coin} **{data.bank:,}**',
+        )
 
         view = discord.ui.View(timeout=60)
         view.add_item(ModalButton(
@@ -617,24 +617,29 @@ class Transactions(Cog):
         embed.description = item.description
         embed.set_thumbnail(url=image_url_from_emoji(item.emoji))
 
-        embed.add_field(name='General', value=dedent(f"""
-            Name: {item.get_display_name(bold=True)}
-            Query Key: **`{item.key}`**
-            Type: **{item.type.name.title()}**
-            Rarity: **{item.rarity.name.title()}**
-        """))
+        embed.add_field(name='General', value=(
+            f'Name: {item.get_display_name(bold=True)}\n'
+            f'Query Key: **`{item.key}`**\n'
+            f'Type: **{item.type.name.title()}**\n'
+            f'Rarity: **{item.rarity.name.title()}**'
+        ))
 
         then = '\n' + Emojis.Expansion.standalone
-        buy_text = f"""\
-            {'Buy Price' if item.buyable else 'Reference Value'}: {Emojis.coin} **{item.price:,}** per unit \
-            {f'{then} Total {Emojis.coin} **{item.price * owned:,}** for the {owned:,} you own' if owned else ''}\
-        """ if not item.sellable or item.price != item.sell else ''
-
-        embed.add_field(name='Pricing', value=dedent(f"""
-            {buy_text}
-            {f'Sell Value: {Emojis.coin} **{item.sell:,}** per unit' if item.sellable else ''} \
-            {f'{then} Total {Emojis.coin} **{item.sell * owned:,}** for the {owned:,} you own' if item.sellable and owned else ''}
-        """), inline=False)
+        pricing = []
+
+        if not item.sellable or item.price != item.sell:
+            line = f'{"Buy Price" if item.buyable else "Reference Value"}: {Emojis.coin} **{item.price:,}** per unit'
+            if owned:
+                line += f'{then} Total {Emojis.coin} **{item.price * owned:,}** for the {owned:,} you own'
+            pricing.append(line)
+
+        if item.sellable:
+            line = f'Sell Value: {Emojis.coin} **{item.sell:,}** per unit'
+            if owned:
+                line += f'{then} Total {Emojis.coin} **{item.sell * owned:,}** for the {owned:,} you own'
+            pricing.append(line)
+
+        embed.add_field(name='Pricing', value='\n'.join(pricing), inline=False)
 
         allowed = []
         forbidden = []
@@ -712,11 +717,11 @@ class Transactions(Cog):
                 f'Your **{Pets.hamster.display}** finds you {Emojis.coin} **{money_back:,}** coins back!',
             )
 
-        async with ctx.db.acquire() as conn:
-            await record.add_random_exp(10, 15, chance=0.5, ctx=ctx, connection=conn)
-            await record.add_random_bank_space(10, 15, chance=0.5, connection=conn)
+        exp = record.roll_exp(10, 15, chance=0.5)
+        bank_space = record.roll_bank_space(10, 15, chance=0.5)
 
-            await record.add(wallet=-price + money_back, connection=conn)
+        async with ctx.db.acquire() as conn:
+            await record.add_rewards(exp=exp, ctx=ctx, connection=conn, wallet=-price + money_back, max_bank=bank_space)
             await inventory.add_item(item, quantity, connection=conn)
 
         embed = discord.Embed(color=Colors.success, timestamp=ctx.now)
@@ -762,11 +767,11 @@ class Transactions(Cog):
         record = await ctx.db.get_user_record(ctx.author.id)
         inventory = record.inventory_manager
 
-        async with ctx.db.acquire() as conn:
-            await record.add_random_exp(10, 15, chance=0.4, ctx=ctx, connection=conn)
-            await record.add_random_bank_space(10, 15, chance=0.4, connection=conn)
+        exp = record.roll_exp(10, 15, chance=0.4)
+        bank_space = record.roll_bank_space(10, 15, chance=0.4)
 
-            await record.add(wallet=value, connection=conn)
+        async with ctx.db.acquire() as conn:
+            await record.add_rewards(exp=exp, ctx=ctx, connection=conn, wallet=value, max_bank=bank_space)
             await inventory.add_item(item, -quantity, connection=conn)
 
         embed = discord.Embed(color=Colors.success, timestamp=ctx.now)
@@ -833,7 +838,7 @@ class Transactions(Cog):
         record = await ctx.db.get_user_record(ctx.author.id)
         inventory = await record.inventory_manager.wait()
 
-        if all(not quantity for quantity in inventory.cached.values()):
+        if not inventory.cached.owned_count:
             return 'You don\'t have any items to sell.', REPLY
 
         if error := discord.utils.find(lambda e: isinstance(e, commands.BadArgument), entities):
@@ -927,14 +932,15 @@ class Transactions(Cog):
         item, quantity = item_and_quantity
         record = await ctx.db.get_user_record(ctx.author.id)
 
-        async with ctx.db.acquire() as conn:
-            await record.add_random_exp(10, 15, chance=0.5, ctx=ctx, connection=conn)
-            await record.add_random_bank_space(10, 15, chance=0.4, connection=conn)
+        # item usage can wait on user interaction, so don't hold a connection across it
+        exp = record.roll_exp(10, 15, chance=0.5)
+        bank_space = record.roll_bank_space(10, 15, chance=0.4)
+        await record.add_rewards(exp=exp, ctx=ctx, max_bank=bank_space)
 
-            quantity = await item.use(ctx, quantity)
+        quantity = await item.use(ctx, quantity)
 
-            if quantity > 0 and item.dispose:
-                await record.inventory_manager.add_item(item, -quantity, connection=conn)
+        if quantity > 0 and item.dispose:
+            await record.inventory_manager.add_item(item, -quantity)
 
         await ctx.thumbs()
 
@@ -960,11 +966,11 @@ class Transactions(Cog):
         """Remove the effects of active items."""
         record = await ctx.db.get_user_record(ctx.author.id)
 
-        async with ctx.db.acquire() as conn:
-            await record.add_random_exp(10, 15, chance=0.4, ctx=ctx, connection=conn)
-            await record.add_random_bank_space(10, 15, chance=0.4, connection=conn)
+        exp = record.roll_exp(10, 15, chance=0.4)
+        bank_space = record.roll_bank_space(10, 15, chance=0.4)
+        await record.add_rewards(exp=exp, ctx=ctx, max_bank=bank_space)
 
-            await item.remove(ctx)
+        await item.remove(ctx)
 
         await ctx.thumbs()
 
@@ -1287,8 +1293,8 @@ class Transactions(Cog):
         bank_requirement = next_prestige * 50_000
         meets_bank = record.bank >= bank_requirement
 
-        unique_items = sum(value > 0 for value in inventory.cached.values())
-        unique_items_requirement = min(48 + next_prestige * 2, len(list(Items.all())) - 4)
+        unique_items = inventory.cached.owned_count
+        unique_items_requirement = min(48 + next_prestige * 2, len(ALL_ITEMS) - 4)
         meets_unique_items = unique_items >= unique_items_requirement
 
         _ = lambda b: Emojis.enabled if b else Emojis.disabled
@@ -6,7 +6,7 @@ import math
 import random
 import re
 from difflib import SequenceMatcher
-from functools import wraps
+from functools import lru_cache, wraps
 from typing import (
     Any,
     Awaitable,
@@ -139,6 +139,11 @@ def image_url_from_emoji(emoji: str | discord.PartialEmoji) -> str:
     if isinstance(emoji, discord.PartialEmoji):
         return emoji.url
 
+    return _image_url_from_emoji_string(emoji)
+
+
+@lru_cache(maxsize=512)
+def _image_url_from_emoji_string(emoji: str) -> str:
     if match := EMOJI_REGEX.match(emoji):
         animated, _, id = match.groups()
         extension = 'gif' if animated else 'png'
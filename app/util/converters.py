@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import functools
 import re
 from datetime import timedelta
 from typing import Callable, ClassVar, Final, Literal, NamedTuple, Type, TYPE_CHECKING
@@ -306,7 +305,24 @@ def ItemAndQuantityConverter(method: Literal[0, 1, 2]) -> Type[Converter | ItemA
     return Wrapper
 
 
-try_query_item = functools.partial(query_collection, Items, Item)
+def _build_exact_item_index() -> dict[str, Item]:
+    index = {}
+    # setdefault keeps the first match in walk order, the same item query_collection would return
+    for item in walk_collection(Items, Item):
+        index.setdefault(item.name.lower(), item)
+        index.setdefault(item.key, item)
+
+    return index
+
+
+_EXACT_ITEM_INDEX: Final[dict[str, Item]] = _build_exact_item_index()
+
+
+def try_query_item(query: str, /, *, prioritizer: Callable[[Item], int] = lambda _: 0) -> Item | None:
+    if item := _EXACT_ITEM_INDEX.get(query.lower()):
+        return item
+
+    return query_collection(Items, Item, query, prioritizer=prioritizer)
 
 
 def query_item(query: str, /, *, prioritizer: Callable[[Item], int] = lambda _: 0) -> Item:
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 # import datetime
+import asyncio
+import os
 from datetime import timedelta
 from io import BytesIO
 from typing import TYPE_CHECKING
@@ -45,6 +47,9 @@ def create_gradient_array(color, *, alpha_min=0, alpha_max=1):
 
 MAX_PADDING = 20_000
 
+# Rendering is CPU-bound, so cap how many graphs are drawn in the executor at once
+_render_semaphore = asyncio.Semaphore(os.cpu_count() or 1)
+
 
 @executor_function
 def create_graph(x, y, **kwargs):
@@ -135,6 +140,7 @@ def process_image(avatar_bytes: BytesIO, target: BytesIO):
 
 async def send_graph_to(ctx: Context, target, *graph_args, filename=None, content=None, embed=None, **graph_kwargs):
     filename = filename or 'graph.png'
-    graph = await create_graph(*graph_args, **graph_kwargs)
-    buffer = await process_image(target, graph)
+    async with _render_semaphore:
+        graph = await create_graph(*graph_args, **graph_kwargs)
+        buffer = await process_image(target, graph)
     await ctx.reply(content, embed=embed, file=discord.File(buffer, filename))
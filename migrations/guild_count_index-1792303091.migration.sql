@@ -0,0 +1,2 @@
+CREATE INDEX IF NOT EXISTS guild_count_graph_data_timestamp_idx
+    ON guild_count_graph_data (timestamp) INCLUDE (guild_count);
\ No newline at end of file